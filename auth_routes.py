@@ -1,21 +1,22 @@
 import logging
 
-from fastapi import APIRouter, status, Depends, HTTPException, Header
-from pydantic import BaseModel
+from fastapi import APIRouter, status, Depends, HTTPException, Header, Request
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from database import get_db
-from log_config import setup_logging
 from models import User
-from utils import hash_password, verify_password, create_token, get_current_user, date
+from utils import hash_password_async, verify_password_async, create_token, get_current_user, now_str
 
-# Set up logging
-setup_logging()
 logger = logging.getLogger(__name__)
 
 
 # Pydantic models for user data
 class LoginUser(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+
     username: str
     password: str
 
@@ -28,43 +29,54 @@ class SignupUser(LoginUser):
 auth_router = APIRouter(prefix='/auth', tags=['auth'])
 
 
-@auth_router.post("/signup", response_model=dict, status_code=status.HTTP_201_CREATED)
-async def signup(user: SignupUser, db: Session = Depends(get_db)) -> dict:
+@auth_router.post("/signup", status_code=status.HTTP_201_CREATED)
+async def signup(user: SignupUser, request: Request, db: Session = Depends(get_db)) -> dict:
     """Create a new user.
 
     Args:
         user (SignupUser): User signup details including username, password, and email.
+        request (Request): Incoming request, used to reach the crypto process pool.
         db (Session): Database session.
 
     Returns:
         dict: Confirmation message with user details.
     """
     try:
-        # Check if the username already exists
-        if db.query(User).filter(User.username == user.username).first():
-            error_message = f"Username: {user.username}, already registered"
-            logger.error(error_message)
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error_message)
-
-        # Check if the email already exists
-        if db.query(User).filter(User.email == user.email).first():
-            error_message = f"Email ID: {user.email}, already registered"
+        # Check if the username or email already exists in a single query
+        existing = db.query(User.username, User.email).filter(
+            or_(User.username == user.username, User.email == user.email)
+        ).first()
+
+        if existing:
+            if existing.username == user.username:
+                error_message = f"Username: {user.username}, already registered"
+            else:
+                error_message = f"Email ID: {user.email}, already registered"
             logger.error(error_message)
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error_message)
 
         # Hash the password and create the new user
-        hashed_password = hash_password(user.password)
+        hashed_password = await hash_password_async(user.password, getattr(request.app.state, "crypto_pool", None))
         new_user = User(username=user.username, email=user.email, password=hashed_password)
 
         # Add the new user to the database
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        try:
+            db.commit()
+        except IntegrityError as e:
+            # A concurrent signup took the username or email after the check above
+            db.rollback()
+            if "username" in str(e.orig):
+                error_message = f"Username: {user.username}, already registered"
+            else:
+                error_message = f"Email ID: {user.email}, already registered"
+            logger.error(error_message)
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error_message)
 
         return {
             "detail": f"User created successfully, user ID {new_user.id}!",
             "user": {"email": new_user.email, "username": new_user.username},
-            "date_time": date,
+            "date_time": now_str(),
         }
 
     except HTTPException as http_exc:
@@ -75,12 +87,13 @@ async def signup(user: SignupUser, db: Session = Depends(get_db)) -> dict:
                             detail="An error occurred while creating the user.")
 
 
-@auth_router.post("/login", response_model=dict, status_code=status.HTTP_200_OK)
-async def login(user: LoginUser, db: Session = Depends(get_db)) -> dict:
+@auth_router.post("/login", status_code=status.HTTP_200_OK)
+async def login(user: LoginUser, request: Request, db: Session = Depends(get_db)) -> dict:
     """Authenticate a user and return tokens.
 
     Args:
         user (LoginUser): User login details including username and password.
+        request (Request): Incoming request, used to reach the crypto process pool.
         db (Session): Database session.
 
     Returns:
@@ -96,17 +109,19 @@ async def login(user: LoginUser, db: Session = Depends(get_db)) -> dict:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error_message)
 
         # Verify the password
-        if not verify_password(user.password, db_user.password):
+        if not await verify_password_async(
+                user.password, db_user.password, getattr(request.app.state, "crypto_pool", None)
+        ):
             error_message = "Invalid password"
             logger.error(error_message)
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error_message)
 
         # Create tokens for the user
-        tokens = create_token(db_user.username)
+        tokens = create_token(db_user.username, bool(db_user.is_staff))
 
         return {
             "detail": "Login successful",
-            "date_time": date,
+            "date_time": now_str(),
             "token": tokens,
         }
 
@@ -117,7 +132,7 @@ async def login(user: LoginUser, db: Session = Depends(get_db)) -> dict:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An error occurred during login.")
 
 
-@auth_router.get('/', response_model=dict, status_code=status.HTTP_200_OK)
+@auth_router.get('/', status_code=status.HTTP_200_OK)
 async def auth_index() -> dict:
     """Sample hello world route.
 
@@ -126,11 +141,11 @@ async def auth_index() -> dict:
     """
     return {
         "message": "Hello World",
-        "date_time": date,
+        "date_time": now_str(),
     }
 
 
-@auth_router.get('/message', response_model=dict, status_code=status.HTTP_200_OK)
+@auth_router.get('/message', status_code=status.HTTP_200_OK)
 async def auth_message(token: str = Header(...)) -> dict:
     """Protected route that returns a greeting message.
 
@@ -141,10 +156,10 @@ async def auth_message(token: str = Header(...)) -> dict:
         dict: Greeting message and the current user.
     """
     try:
-        current_user = await get_current_user(token)
+        current_user, _ = await get_current_user(token)
         return {
             "message": "Hello World",
-            "date_time": date,
+            "date_time": now_str(),
             "user": current_user,
         }
 
@@ -156,23 +171,32 @@ async def auth_message(token: str = Header(...)) -> dict:
                             detail="An error occurred during auth message.")
 
 
-@auth_router.get('/refresh', response_model=dict, status_code=status.HTTP_200_OK)
-async def refresh_token(token: str = Header(...)) -> dict:
+@auth_router.get('/refresh', status_code=status.HTTP_200_OK)
+async def refresh_token(token: str = Header(...), db: Session = Depends(get_db)) -> dict:
     """Refresh the user's token.
 
     Args:
         token (str): JWT token from the request header.
+        db (Session): Database session.
 
     Returns:
         dict: Confirmation message and new tokens.
     """
     try:
-        current_user = await get_current_user(token)
-        tokens = create_token(current_user)
+        current_user, _ = await get_current_user(token)
+
+        # Re-read the staff flag so demotions and deleted accounts are not carried forward
+        db_user = db.query(User.is_staff).filter(User.username == current_user).first()
+        if db_user is None:
+            error_message = "Could not validate credentials"
+            logger.error(f"Refresh for unknown user: {current_user}")
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=error_message)
+
+        tokens = create_token(current_user, bool(db_user.is_staff))
 
         return {
             "detail": "Token is refreshed",
-            "date_time": date,
+            "date_time": now_str(),
             "token": tokens,
         }
 
@@ -0,0 +1,4 @@
+import os
+
+# Keep bcrypt cheap for the test run; must be set before utils is imported
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
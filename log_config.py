@@ -1,5 +1,74 @@
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Background listener that owns the real handlers
+_listener = None
+
+
+class BatchingRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler that buffers formatted records and writes them in one call per batch.
+
+    A batch is written when it reaches batch_size characters or when flush() is called.
+    """
+
+    def __init__(self, filename, batch_size=64 * 1024, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.batch_size = batch_size
+        self._batch = []
+        self._batch_len = 0
+        self._last_record = None
+
+    def emit(self, record):
+        try:
+            msg = self.format(record) + self.terminator
+        except Exception:
+            self.handleError(record)
+            return
+
+        self._batch.append(msg)
+        self._batch_len += len(msg)
+        self._last_record = record
+        if self._batch_len >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        self.acquire()
+        try:
+            if self._batch:
+                data = ''.join(self._batch)
+                self._batch.clear()
+                self._batch_len = 0
+
+                if self.stream is None:
+                    self.stream = self._open()
+                # Check for rollover once per batch rather than once per record
+                if self.maxBytes > 0 and 0 < self.stream.tell() and self.stream.tell() + len(data) >= self.maxBytes:
+                    self.doRollover()
+                self.stream.write(data)
+            super().flush()
+        except Exception:
+            # Same contract as StreamHandler.emit: report and carry on, never raise into the caller
+            self.handleError(self._last_record)
+        finally:
+            self.release()
+
+
+class BatchingQueueListener(QueueListener):
+    """
+    QueueListener that flushes its handlers only once the queue has been drained.
+    """
+
+    def handle(self, record):
+        super().handle(record)
+        if self.queue.empty():
+            for handler in self.handlers:
+                try:
+                    handler.flush()
+                except Exception:
+                    # A failing handler must not stop the listener thread
+                    handler.handleError(record)
 
 
 def setup_logging(log_file='app.log', log_level=logging.INFO):
@@ -9,7 +78,15 @@ def setup_logging(log_file='app.log', log_level=logging.INFO):
     Parameters:
     - log_file: Name of the file where logs will be saved.
     - log_level: The level of logging (e.g., logging.INFO, logging.DEBUG).
+
+    Returns:
+    - The started QueueListener that writes records to the console and file.
     """
+    global _listener
+    # Already configured; avoid tearing down and rebuilding the handlers
+    if _listener is not None:
+        return _listener
+
     # Create a logger
     logger = logging.getLogger()
     logger.setLevel(log_level)  # Set the logging level
@@ -27,13 +104,30 @@ def setup_logging(log_file='app.log', log_level=logging.INFO):
     # file_handler = TimedRotatingFileHandler(log_file, when='midnight', interval=1, backupCount=7)  # Daily rotation
 
     # 2. Use TimedRotatingFileHandler for time-based rotation.
-    file_handler = RotatingFileHandler(log_file, maxBytes=10 * 1024 * 1024, backupCount=5)  # 10 MB size limit
+    # Batched variant so bursts of records reach the file in a few large writes
+    file_handler = BatchingRotatingFileHandler(log_file, maxBytes=10 * 1024 * 1024, backupCount=5)  # 10 MB size limit
     file_handler.setFormatter(formatter)
 
     # Remove existing handlers
     if logger.hasHandlers():
         logger.handlers.clear()
 
-    # Add handlers to the logger
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    # Records are queued on the calling thread and written by a background listener
+    log_queue = queue.Queue(-1)
+    logger.addHandler(QueueHandler(log_queue))
+
+    _listener = BatchingQueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """
+    Flush queued log records and stop the background listener.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
@@ -1,12 +1,57 @@
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI, status
 from fastapi.middleware.cors import CORSMiddleware
 
 from auth_routes import auth_router
+from log_config import setup_logging, stop_logging
 from models import init_db
 from order_routes import order_router
 
-app = FastAPI()
+# DEV enables auto-reload, which only supports a single worker
+DEV_MODE = os.getenv("DEV", "").strip().lower() in ("1", "true", "yes", "on")
+CPU_COUNT = os.cpu_count() or 1
+# Single worker unless WEB_CONCURRENCY asks for more
+WEB_WORKERS = 1 if DEV_MODE else max(1, int(os.getenv("WEB_CONCURRENCY") or 1))
+# Every uvicorn worker has its own pool, so split the CPUs between workers rather than
+# starting CPU_COUNT hashing processes in each. DB pools and caches are per worker as well.
+CRYPTO_WORKERS = max(1, CPU_COUNT // WEB_WORKERS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Set up logging, the database and the crypto pool for the lifetime of the app.
+
+    Kept out of module scope so that spawned pool processes, which re-import this module,
+    do not repeat any of it.
+    """
+    # Set up logging once for the whole application. Rotating one file from several
+    # processes is unsupported, so each worker gets its own file when there are several.
+    setup_logging(log_file='app.log' if WEB_WORKERS == 1 else f'app.{os.getpid()}.log')
+
+    # Initialize the database
+    init_db()
+
+    # Spawn rather than fork: forking would copy the log listener's queue and locks into the children
+    app.state.crypto_pool = ProcessPoolExecutor(
+        max_workers=CRYPTO_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+    try:
+        yield
+    finally:
+        app.state.crypto_pool.shutdown(wait=False, cancel_futures=True)
+        # Flush pending log records before exit
+        stop_logging()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS Middleware
 app.add_middleware(
@@ -17,11 +62,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize the database
-init_db()
-
 
-@app.get("/", response_model=dict, status_code=status.HTTP_200_OK)
+@app.get("/", status_code=status.HTTP_200_OK)
 async def index() -> dict:
     """Welcome endpoint.
 
@@ -37,4 +79,12 @@ app.include_router(auth_router)
 app.include_router(order_router)
 
 if __name__ == '__main__':
-    uvicorn.run("main_app:app", host="0.0.0.0", port=8181, reload=True)
+    uvicorn.run(
+        "main_app:app",
+        host="0.0.0.0",
+        port=8181,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        workers=WEB_WORKERS,
+        reload=DEV_MODE,
+    )
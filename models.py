@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Enum, Text
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Enum, Text, Index
 from sqlalchemy.orm import relationship, declarative_base
 
 from database import engine
@@ -21,6 +21,10 @@ class User(Base):
 
 class Order(Base):
     __tablename__ = 'orders'
+    __table_args__ = (
+        # Serves user-scoped lookups by (user_id, id) as well as user_id alone
+        Index("ix_orders_user_id_id", "user_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     quantity = Column(Integer, nullable=False)
@@ -34,3 +38,7 @@ class Order(Base):
 
 def init_db():
     Base.metadata.create_all(bind=engine)
+
+    # create_all skips existing tables, so add any indexes they are missing
+    for index in Order.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
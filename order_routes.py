@@ -1,26 +1,49 @@
 import logging
-from typing import Literal, Dict, Any
+import time
+from collections import OrderedDict
+from typing import Literal, Dict, Any, NamedTuple, Optional
 
 from fastapi import APIRouter, status, Depends, Header, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import Row, bindparam, select
 from sqlalchemy.orm import Session
 
 from database import get_db
-from log_config import setup_logging
 from models import Order, User
-from utils import date, get_current_user
+from utils import get_current_user, now_str
 
-# Set up logging
-setup_logging()
 logger = logging.getLogger(__name__)
 
 
 class PlaceOrder(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+
     quantity: int
     pizza_size: Literal["small", "medium", "large", "extra-large"]
     flavour: bool
 
 
+# Hot lookups built once so SQLAlchemy can reuse the compiled SQL
+_ORDER_BY_ID = select(Order).where(Order.id == bindparam("oid"))
+_ORDER_BY_ID_USER = select(Order).where(Order.id == bindparam("oid"), Order.user_id == bindparam("uid"))
+
+# Column-only listing query; rows skip ORM object materialisation
+_ORDER_ROWS = select(
+    Order.id, Order.quantity, Order.pizza_size, Order.flavour, Order.order_status, User.username
+).join(User, Order.user_id == User.id)
+_ORDER_ROWS_BY_USER = _ORDER_ROWS.where(Order.user_id == bindparam("uid"))
+
+# Recently authenticated users, mapped to their (user ID, timestamp)
+USER_CACHE_SIZE = 4096
+USER_CACHE_TTL = 30  # seconds
+_user_cache: "OrderedDict[str, tuple[int, float]]" = OrderedDict()
+
+
+class AuthenticatedUser(NamedTuple):
+    id: int
+    username: str
+
+
 # Initialize the router
 order_router = APIRouter(
     prefix="/orders",
@@ -28,20 +51,34 @@ order_router = APIRouter(
 )
 
 
-async def get_authenticated_user(token: str, db: Session) -> User:
-    """Helper function to retrieve the authenticated user."""
-    username = await get_current_user(token)
-    user = db.query(User).filter(User.username == username).first()
+async def get_authenticated_user(token: str, db: Session) -> AuthenticatedUser:
+    """Helper function to retrieve the authenticated user, cached briefly by username."""
+    username, _ = await get_current_user(token)
+
+    now = time.monotonic()
+    cached = _user_cache.get(username)
+    if cached is not None and now - cached[1] < USER_CACHE_TTL:
+        _user_cache.move_to_end(username)
+        return AuthenticatedUser(cached[0], username)
+
+    user = db.query(User.id).filter(User.username == username).first()
     if not user:
+        _user_cache.pop(username, None)
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found.")
-    return user
 
+    _user_cache[username] = (user.id, now)
+    _user_cache.move_to_end(username)
+    if len(_user_cache) > USER_CACHE_SIZE:
+        _user_cache.popitem(last=False)
+
+    return AuthenticatedUser(user.id, username)
 
-def format_order_response(order: Order) -> Dict[str, Any]:
-    """Format the order details for response."""
+
+def format_order_response(order: Order, username: Optional[str] = None) -> Dict[str, Any]:
+    """Format the order details for response, loading the owner only if username is not given."""
     return {
         "id": order.id,
-        "user_id": order.user.username,
+        "user_id": username if username is not None else order.user.username,
         "quantity": order.quantity,
         "pizza_size": order.pizza_size,
         "flavour": order.flavour,
@@ -49,7 +86,19 @@ def format_order_response(order: Order) -> Dict[str, Any]:
     }
 
 
-@order_router.post('/', response_model=dict, status_code=status.HTTP_201_CREATED)
+def format_order_row(row: Row) -> Dict[str, Any]:
+    """Format an order row from a column query for response."""
+    return {
+        "id": row.id,
+        "user_id": row.username,
+        "quantity": row.quantity,
+        "pizza_size": row.pizza_size,
+        "flavour": row.flavour,
+        "order_status": row.order_status,
+    }
+
+
+@order_router.post('/', status_code=status.HTTP_201_CREATED)
 async def place_an_order(
         order: PlaceOrder,
         db: Session = Depends(get_db),
@@ -74,17 +123,16 @@ async def place_an_order(
             order_status="pending",
             pizza_size=order.pizza_size,
             flavour=order.flavour,
-            user=db_user  # Associate user directly
+            user_id=db_user.id
         )
 
         db.add(new_order)
         db.commit()
-        db.refresh(new_order)
 
         return {
             "detail": f"Order placed successfully, order ID {new_order.id}!",
-            "order": format_order_response(new_order),
-            "date_time": date,
+            "order": format_order_response(new_order, db_user.username),
+            "date_time": now_str(),
         }
 
     except HTTPException as http_exc:
@@ -97,7 +145,7 @@ async def place_an_order(
         )
 
 
-@order_router.get('/', response_model=dict, status_code=status.HTTP_200_OK)
+@order_router.get('/', status_code=status.HTTP_200_OK)
 async def list_all_orders(
         db: Session = Depends(get_db),
         token: str = Header(...)
@@ -112,19 +160,19 @@ async def list_all_orders(
     Returns:
         dict: A message and the list of all orders.
     """
-    db_user = await get_authenticated_user(token, db)
+    _, is_staff = await get_current_user(token)
 
     try:
-        if not db_user.is_staff:
+        if not is_staff:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="You are not a superuser.")
 
-        all_orders = db.query(Order).all()
-        order_list = [format_order_response(order) for order in all_orders]
+        rows = db.execute(_ORDER_ROWS).all()
+        order_list = [format_order_row(row) for row in rows]
 
         return {
             "message": "List of all orders",
             "orders": order_list,
-            "date_time": date,
+            "date_time": now_str(),
         }
 
     except HTTPException as http_exc:
@@ -137,7 +185,7 @@ async def list_all_orders(
         )
 
 
-@order_router.get('/{oid}', response_model=dict, status_code=status.HTTP_200_OK)
+@order_router.get('/{oid}', status_code=status.HTTP_200_OK)
 async def get_order_by_id(oid: int, db: Session = Depends(get_db), token: str = Header(...)) -> Dict[str, Any]:
     """
     Retrieve a specific order by its ID for authorized staff users.
@@ -150,20 +198,20 @@ async def get_order_by_id(oid: int, db: Session = Depends(get_db), token: str =
     Returns:
         dict: A message and the details of the requested order.
     """
-    db_user = await get_authenticated_user(token, db)
+    _, is_staff = await get_current_user(token)
 
     try:
-        if not db_user.is_staff:
+        if not is_staff:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="You are not a superuser.")
 
-        order = db.query(Order).filter(Order.id == oid).first()
+        order = db.execute(_ORDER_BY_ID, {"oid": oid}).scalar_one_or_none()
         if not order:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found.")
 
         return {
             "message": "Order by ID retrieved successfully.",
             "order": format_order_response(order),
-            "date_time": date,
+            "date_time": now_str(),
         }
 
     except HTTPException as http_exc:
@@ -176,7 +224,7 @@ async def get_order_by_id(oid: int, db: Session = Depends(get_db), token: str =
         )
 
 
-@order_router.get('/user/orders', response_model=dict, status_code=status.HTTP_200_OK)
+@order_router.get('/user/orders', status_code=status.HTTP_200_OK)
 async def get_user_orders(db: Session = Depends(get_db), token: str = Header(...)) -> Dict[str, Any]:
     """
     Retrieve all orders for the currently authenticated user.
@@ -191,13 +239,13 @@ async def get_user_orders(db: Session = Depends(get_db), token: str = Header(...
     db_user = await get_authenticated_user(token, db)
 
     try:
-        user_orders = db_user.orders
-        order_list = [format_order_response(order) for order in user_orders]
+        rows = db.execute(_ORDER_ROWS_BY_USER, {"uid": db_user.id}).all()
+        order_list = [format_order_row(row) for row in rows]
 
         return {
             "message": "User orders retrieved successfully.",
             "orders": order_list,
-            "date_time": date,
+            "date_time": now_str(),
         }
 
     except HTTPException as http_exc:
@@ -210,7 +258,7 @@ async def get_user_orders(db: Session = Depends(get_db), token: str = Header(...
         )
 
 
-@order_router.get('/user/order/{oid}', response_model=dict, status_code=status.HTTP_200_OK)
+@order_router.get('/user/order/{oid}', status_code=status.HTTP_200_OK)
 async def get_specific_order(oid: int, db: Session = Depends(get_db), token: str = Header(...)) -> Dict[str, Any]:
     """
     Retrieve a specific order for the currently authenticated user.
@@ -226,14 +274,14 @@ async def get_specific_order(oid: int, db: Session = Depends(get_db), token: str
     db_user = await get_authenticated_user(token, db)
 
     try:
-        order = db.query(Order).filter(Order.id == oid, Order.user_id == db_user.id).first()
+        order = db.execute(_ORDER_BY_ID_USER, {"oid": oid, "uid": db_user.id}).scalar_one_or_none()
         if not order:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found.")
 
         return {
             "message": "Order retrieved successfully.",
-            "order": format_order_response(order),
-            "date_time": date,
+            "order": format_order_response(order, db_user.username),
+            "date_time": now_str(),
         }
 
     except HTTPException as http_exc:
@@ -246,7 +294,7 @@ async def get_specific_order(oid: int, db: Session = Depends(get_db), token: str
         )
 
 
-@order_router.put('/update/{oid}', response_model=dict, status_code=status.HTTP_200_OK)
+@order_router.put('/update/{oid}', status_code=status.HTTP_200_OK)
 async def update_order(
         oid: int,
         order: PlaceOrder,
@@ -269,7 +317,7 @@ async def update_order(
 
     try:
         # Retrieve the existing order
-        existing_order = db.query(Order).filter(Order.id == oid, Order.user_id == db_user.id).first()
+        existing_order = db.execute(_ORDER_BY_ID_USER, {"oid": oid, "uid": db_user.id}).scalar_one_or_none()
 
         if not existing_order:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found.")
@@ -280,12 +328,11 @@ async def update_order(
         existing_order.flavour = order.flavour
 
         db.commit()
-        db.refresh(existing_order)
 
         return {
             "detail": f"Order ID {existing_order.id} updated successfully!",
-            "order": format_order_response(existing_order),
-            "date_time": date,
+            "order": format_order_response(existing_order, db_user.username),
+            "date_time": now_str(),
         }
 
     except HTTPException as http_exc:
@@ -298,7 +345,7 @@ async def update_order(
         )
 
 
-@order_router.put('/status/{oid}', response_model=dict, status_code=status.HTTP_200_OK)
+@order_router.put('/status/{oid}', status_code=status.HTTP_200_OK)
 async def update_order_status(
         oid: int,
         new_status: str,  # New status for the order
@@ -317,16 +364,16 @@ async def update_order_status(
     Returns:
         dict: A message detailing the result of the status update.
     """
-    db_user = await get_authenticated_user(token, db)
+    _, is_staff = await get_current_user(token)
 
     try:
         # Check if the user has staff privileges
-        if not db_user.is_staff:
+        if not is_staff:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
                                 detail="You are not authorized to update order status.")
 
         # Retrieve the existing order
-        order = db.query(Order).filter(Order.id == oid).first()
+        order = db.execute(_ORDER_BY_ID, {"oid": oid}).scalar_one_or_none()
 
         if not order:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found.")
@@ -334,12 +381,11 @@ async def update_order_status(
         # Update the order status
         order.order_status = new_status
         db.commit()
-        db.refresh(order)
 
         return {
             "detail": f"Order ID {order.id} status updated successfully to '{new_status}'!",
             "order": format_order_response(order),
-            "date_time": date,
+            "date_time": now_str(),
         }
 
     except HTTPException as http_exc:
@@ -352,7 +398,7 @@ async def update_order_status(
         )
 
 
-@order_router.delete('/delete/{oid}', response_model=dict, status_code=status.HTTP_200_OK)
+@order_router.delete('/delete/{oid}', status_code=status.HTTP_200_OK)
 async def delete_order(
         oid: int,
         db: Session = Depends(get_db),
@@ -372,7 +418,7 @@ async def delete_order(
     db_user = await get_authenticated_user(token, db)
     try:
         # Retrieve the order by ID and ensure it belongs to the current user
-        order = db.query(Order).filter(Order.id == oid, Order.user_id == db_user.id).first()
+        order = db.execute(_ORDER_BY_ID_USER, {"oid": oid, "uid": db_user.id}).scalar_one_or_none()
 
         if not order:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found.")
@@ -383,7 +429,7 @@ async def delete_order(
 
         return {
             "detail": f"Order ID {oid} deleted successfully.",
-            "date_time": date,
+            "date_time": now_str(),
         }
 
     except HTTPException as http_exc:
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import order_routes
+import utils
+from models import Base, User
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([
+        User(username="alice", email="alice@example.com", password="x"),
+        User(username="bob", email="bob@example.com", password="x"),
+    ])
+    session.commit()
+
+    order_routes._user_cache.clear()
+    utils._token_cache.clear()
+    yield session
+    order_routes._user_cache.clear()
+    utils._token_cache.clear()
+    session.close()
+
+
+def authenticate(username, db):
+    token = utils.create_token(username)["access_token"]
+    return asyncio.run(order_routes.get_authenticated_user(token, db))
+
+
+def test_user_cache_skips_lookup_within_ttl(db):
+    user = authenticate("alice", db)
+    assert user.username == "alice"
+
+    # A cached user is returned without touching the database
+    db.query(User).filter(User.username == "alice").delete()
+    db.commit()
+    assert authenticate("alice", db) == user
+
+
+def test_user_cache_expires(db, monkeypatch):
+    authenticate("alice", db)
+    db.query(User).filter(User.username == "alice").delete()
+    db.commit()
+
+    monkeypatch.setattr(order_routes, "USER_CACHE_TTL", 0)
+    with pytest.raises(HTTPException) as exc_info:
+        authenticate("alice", db)
+    assert exc_info.value.status_code == 404
+    assert "alice" not in order_routes._user_cache
+
+
+def test_user_cache_evicts_least_recently_used(db, monkeypatch):
+    monkeypatch.setattr(order_routes, "USER_CACHE_SIZE", 1)
+
+    authenticate("alice", db)
+    authenticate("bob", db)
+
+    assert list(order_routes._user_cache) == ["bob"]
+
+
+def test_unknown_user_not_cached(db):
+    with pytest.raises(HTTPException):
+        authenticate("carol", db)
+    assert "carol" not in order_routes._user_cache
@@ -0,0 +1,130 @@
+import asyncio
+import time
+
+import jwt
+import pytest
+from fastapi import HTTPException
+
+import utils
+
+
+def test_hash_and_verify_password():
+    hashed = utils.hash_password("secret")
+
+    assert utils.verify_password("secret", hashed)
+    assert not utils.verify_password("wrong", hashed)
+
+
+def test_verify_password_unknown_hash():
+    assert utils._check_password("secret", "not-a-hash") is False
+
+
+def test_verify_password_malformed_hash():
+    assert utils._check_password("secret", "$2b$12$short") is False
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    utils._verify_cache.clear()
+    utils._token_cache.clear()
+    yield
+    utils._verify_cache.clear()
+    utils._token_cache.clear()
+
+
+def test_create_token_round_trip():
+    tokens = utils.create_token("alice", is_staff=True)
+
+    for name in ("access_token", "refresh_token"):
+        payload = jwt.decode(tokens[name], utils.SECRET_KEY, algorithms=["HS256"])
+        assert payload["sub"] == "alice"
+        assert payload["staff"] is True
+        assert isinstance(payload["exp"], int)
+
+    assert jwt.get_unverified_header(tokens["access_token"]) == {"alg": "HS256", "typ": "JWT"}
+
+
+def test_create_token_tampered_signature_rejected():
+    token = utils.create_token("alice")["access_token"]
+    header, payload, signature = token.split(".")
+    tampered = f"{header}.{payload}.{'A' if signature[0] != 'A' else 'B'}{signature[1:]}"
+
+    with pytest.raises(jwt.InvalidSignatureError):
+        jwt.decode(tampered, utils.SECRET_KEY, algorithms=["HS256"])
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(utils.get_current_user(tampered))
+    assert exc_info.value.status_code == 401
+
+
+def test_create_token_tampered_payload_rejected():
+    token = utils.create_token("alice")["access_token"]
+    header, _, signature = token.split(".")
+    forged = utils._b64url(b'{"sub":"mallory","staff":true,"exp":9999999999}').decode()
+
+    with pytest.raises(jwt.InvalidSignatureError):
+        jwt.decode(f"{header}.{forged}.{signature}", utils.SECRET_KEY, algorithms=["HS256"])
+
+
+def test_verify_cache_hit_and_ttl(monkeypatch):
+    calls = []
+
+    def fake_check(plain, hashed):
+        calls.append(plain)
+        return True
+
+    monkeypatch.setattr(utils, "_check_password", fake_check)
+
+    assert utils.verify_password("secret", "hash")
+    assert utils.verify_password("secret", "hash")
+    assert len(calls) == 1
+
+    monkeypatch.setattr(utils, "VERIFY_CACHE_TTL", 0)
+    assert utils.verify_password("secret", "hash")
+    assert len(calls) == 2
+
+
+def test_verify_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(utils, "_check_password", lambda plain, hashed: True)
+    monkeypatch.setattr(utils, "VERIFY_CACHE_SIZE", 2)
+
+    for password in ("a", "b", "c"):
+        utils.verify_password(password, "hash")
+
+    assert len(utils._verify_cache) == 2
+    assert utils._verify_cache_key("a", "hash") not in utils._verify_cache
+
+
+def test_token_cache_hit_and_expiry():
+    token = utils.create_token("alice")["access_token"]
+
+    assert asyncio.run(utils.get_current_user(token)) == ("alice", False)
+    assert token in utils._token_cache
+
+    # Age the cached entry past its expiry
+    username, is_staff, _ = utils._token_cache[token]
+    utils._token_cache[token] = (username, is_staff, int(time.time()) - 1)
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(utils.get_current_user(token))
+    assert exc_info.value.detail == "Token has expired"
+    assert token not in utils._token_cache
+
+
+def test_expired_token_rejected():
+    token = utils.encode_token({"sub": "alice", "exp": int(time.time()) - 10})
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(utils.get_current_user(token))
+    assert exc_info.value.detail == "Token has expired"
+    assert token not in utils._token_cache
+
+
+def test_token_cache_evicts_oldest(monkeypatch):
+    monkeypatch.setattr(utils, "TOKEN_CACHE_SIZE", 2)
+    tokens = [utils.create_token(name)["access_token"] for name in ("a", "b", "c")]
+
+    for token in tokens:
+        asyncio.run(utils.get_current_user(token))
+
+    assert list(utils._token_cache) == tokens[1:]
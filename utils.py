@@ -1,11 +1,21 @@
+import asyncio
+import base64
+import hashlib
+import hmac
 import os
-from datetime import datetime, timedelta, timezone
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor
+from datetime import datetime
+from typing import Optional, Tuple
 
-import bcrypt
 import jwt
+import orjson
 from dotenv import load_dotenv
 from fastapi import HTTPException, status
 from jwt import ExpiredSignatureError, InvalidTokenError
+from passlib.context import CryptContext
+from passlib.exc import UnknownHashError
 
 # Load environment variables
 load_dotenv()
@@ -13,10 +23,59 @@ SECRET_KEY = os.getenv("SECRET_KEY", "Secret_Key-2024")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 7))
-date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+_ACCESS_TTL = ACCESS_TOKEN_EXPIRE_MINUTES * 60  # seconds
+_REFRESH_TTL = REFRESH_TOKEN_EXPIRE_DAYS * 86400  # seconds
+
+# Formatted timestamp, refreshed at most once per second
+_last_ts = 0
+_last_str = ""
+
+# In-process cache of recent bcrypt verification results
+VERIFY_CACHE_SIZE = 2048
+VERIFY_CACHE_TTL = 300  # seconds
+_verify_cache: "OrderedDict[bytes, tuple[bool, float]]" = OrderedDict()
+
+# New hashes use bcrypt_sha256; plain bcrypt stays verifiable for existing users
+pwd_context = CryptContext(
+    schemes=["bcrypt_sha256", "bcrypt"],
+    default="bcrypt_sha256",
+    bcrypt_sha256__rounds=BCRYPT_ROUNDS,
+)
+
+# Decoded tokens, mapped to their (username, is_staff, exp) claims
+TOKEN_CACHE_SIZE = 8192
+_token_cache: dict[str, tuple[str, bool, int]] = {}
+
+
+def _b64url(data: bytes) -> bytes:
+    """Base64url-encode without padding, as required by JWS."""
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+# The HS256 header never changes, so encode it once
+_HEADER_B64 = _b64url(orjson.dumps({"alg": "HS256", "typ": "JWT"}))
+
+# Pre-keyed HMAC context; copying it skips the key setup on every call
+_HMAC_TEMPLATE = hmac.new(SECRET_KEY.encode('utf-8'), b"", hashlib.sha256)
+
+
+def now_str() -> str:
+    """Return the current local time as a formatted string.
+
+    Returns:
+        str: The current date and time, formatted once per second.
+    """
+    global _last_ts, _last_str
+    ts = int(time.time())
+    if ts != _last_ts:
+        _last_str = datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
+        _last_ts = ts
+    return _last_str
+
 
 def hash_password(password: str) -> str:
-    """Hash a password using bcrypt.
+    """Hash a password using bcrypt_sha256.
 
     Args:
         password (str): The plain text password.
@@ -24,7 +83,46 @@ def hash_password(password: str) -> str:
     Returns:
         str: The hashed password.
     """
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return pwd_context.hash(password)
+
+
+def _verify_cache_key(plain_password: str, hashed_password: str) -> bytes:
+    """Build the cache key for a password/hash pair."""
+    # Key the cache on a keyed digest so plain text passwords are never held in memory
+    h = _HMAC_TEMPLATE.copy()
+    h.update(plain_password.encode('utf-8') + b"\x00" + hashed_password.encode('utf-8'))
+    return h.digest()
+
+
+def _get_cached_result(key: bytes) -> Optional[bool]:
+    """Return a cached verification result, or None if missing or expired."""
+    cached = _verify_cache.get(key)
+    if cached is None:
+        return None
+
+    result, timestamp = cached
+    if time.monotonic() - timestamp >= VERIFY_CACHE_TTL:
+        _verify_cache.pop(key, None)
+        return None
+
+    _verify_cache.move_to_end(key)
+    return result
+
+
+def _store_result(key: bytes, result: bool) -> None:
+    """Store a verification result, evicting the least recently used entry."""
+    _verify_cache[key] = (result, time.monotonic())
+    if len(_verify_cache) > VERIFY_CACHE_SIZE:
+        _verify_cache.popitem(last=False)
+
+
+def _check_password(plain_password: str, hashed_password: str) -> bool:
+    """Run the actual hash comparison without touching the cache."""
+    try:
+        return pwd_context.verify(plain_password, hashed_password)
+    except (UnknownHashError, ValueError):
+        # Unknown or malformed stored hash, or a password the scheme cannot accept
+        return False
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -37,37 +135,102 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         bool: True if the password matches, otherwise False.
     """
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+    key = _verify_cache_key(plain_password, hashed_password)
+    result = _get_cached_result(key)
+    if result is None:
+        result = _check_password(plain_password, hashed_password)
+        _store_result(key, result)
+    return result
+
+
+async def hash_password_async(password: str, executor: Optional[Executor] = None) -> str:
+    """Hash a password without blocking the event loop.
+
+    Args:
+        password (str): The plain text password.
+        executor (Executor, optional): Pool to run the hash in; the loop's default if None.
+
+    Returns:
+        str: The hashed password.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str,
+                                executor: Optional[Executor] = None) -> bool:
+    """Verify a password without blocking the event loop.
+
+    The result cache is checked in this process; only cache misses are sent to the executor.
+
+    Args:
+        plain_password (str): The plain text password.
+        hashed_password (str): The hashed password.
+        executor (Executor, optional): Pool to run the hash in; the loop's default if None.
+
+    Returns:
+        bool: True if the password matches, otherwise False.
+    """
+    key = _verify_cache_key(plain_password, hashed_password)
+    result = _get_cached_result(key)
+    if result is None:
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(executor, _check_password, plain_password, hashed_password)
+        _store_result(key, result)
+    return result
+
+
+def _sign(message: bytes) -> bytes:
+    """Compute the HS256 signature of a JWS signing input."""
+    h = _HMAC_TEMPLATE.copy()
+    h.update(message)
+    return h.digest()
+
 
+def encode_token(payload: dict) -> str:
+    """Encode a JWT, signing HS256 tokens directly instead of through PyJWT.
 
-def create_token(subject: str) -> dict:
+    Args:
+        payload (dict): The token claims; "exp" must already be a Unix timestamp.
+
+    Returns:
+        str: The encoded JWT.
+    """
+    if ALGORITHM != "HS256":
+        return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+
+    signing_input = _HEADER_B64 + b"." + _b64url(orjson.dumps(payload))
+    return (signing_input + b"." + _b64url(_sign(signing_input))).decode('ascii')
+
+
+def create_token(subject: str, is_staff: bool = False) -> dict:
     """Create a JWT token.
 
     Args:
         subject (str): The subject for the token.
+        is_staff (bool): Whether the subject has staff privileges, stored as the "staff" claim.
 
     Returns:
         dict: The encoded JWT tokens like access and refresh.
     """
+    now = int(time.time())
 
     # Create access token
-    access_token = jwt.encode(
+    access_token = encode_token(
         {
             "sub": subject,
-            "exp": datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-        },
-        SECRET_KEY,
-        algorithm=ALGORITHM
+            "staff": is_staff,
+            "exp": now + _ACCESS_TTL
+        }
     )
 
     # Create refresh token
-    refresh_token = jwt.encode(
+    refresh_token = encode_token(
         {
             "sub": subject,
-            "exp": datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-        },
-        SECRET_KEY,
-        algorithm=ALGORITHM
+            "staff": is_staff,
+            "exp": now + _REFRESH_TTL
+        }
     )
 
     return {
@@ -77,18 +240,26 @@ def create_token(subject: str) -> dict:
     }
 
 
-async def get_current_user(token: str) -> str:
-    """Get the current user's username from the token.
+async def get_current_user(token: str) -> Tuple[str, bool]:
+    """Get the current user's username and staff flag from the token.
 
     Args:
         token (str): The JWT token.
 
     Returns:
-        str: The username of the current user.
+        Tuple[str, bool]: The username of the current user and whether they are staff.
 
     Raises:
         HTTPException: If token is invalid or expired.
     """
+    cached = _token_cache.get(token)
+    if cached is not None:
+        username, is_staff, exp = cached
+        if exp > time.time():
+            return username, is_staff
+        _token_cache.pop(token, None)
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has expired")
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username = payload.get("sub")
@@ -96,9 +267,20 @@ async def get_current_user(token: str) -> str:
         if username is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
 
-        return username
+        # Tokens issued without the claim are treated as non-staff
+        is_staff = payload.get("staff") is True
+
+        # Only tokens that carry an expiry are cached, so entries can never outlive the token
+        exp = payload.get("exp")
+        if isinstance(exp, int):
+            if len(_token_cache) >= TOKEN_CACHE_SIZE:
+                _token_cache.pop(next(iter(_token_cache)), None)
+            _token_cache[token] = (username, is_staff, exp)
+
+        return username, is_staff
 
     except ExpiredSignatureError:
+        _token_cache.pop(token, None)
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has expired")
     except InvalidTokenError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")